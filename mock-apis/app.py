@@ -1,9 +1,16 @@
-from flask import Flask, jsonify, request
+from flask import Flask, request
 from flask_cors import CORS
+import gzip
+import msgpack
+import numpy as np
+import orjson
 import random
 import time
 from datetime import datetime
+import bisect
+import functools
 import logging
+import threading
 
 app = Flask(__name__)
 CORS(app)
@@ -12,6 +19,49 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _json_default(obj):
+    # Keep datetime output identical to the old jsonify/.isoformat() responses
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+def encode_body(data, mimetype=JSON_MIMETYPE):
+    """Serialize with msgpack or orjson (instead of Flask's stdlib-based jsonify)"""
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb(data, use_bin_type=True)
+    return orjson.dumps(data, default=_json_default,
+                        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+def ojson(data, status=200):
+    """Build a JSON response with orjson"""
+    return app.response_class(encode_body(data), status=status, mimetype=JSON_MIMETYPE)
+
+def preferred_mimetype():
+    """MessagePack when the client prefers it via Accept, JSON otherwise"""
+    if request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+        return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+def vary_on_accept(response):
+    """Mark a content-negotiated response so shared/browser caches key it on Accept"""
+    response.vary.add('Accept')
+    return response
+
+def negotiated(data, status=200):
+    """Respond in whichever format the client's Accept header prefers"""
+    mimetype = preferred_mimetype()
+    return vary_on_accept(app.response_class(encode_body(data, mimetype), status=status, mimetype=mimetype))
+
+def ndjson_response(rows):
+    """Stream rows as newline-delimited JSON so the first record goes out before the last is encoded"""
+    def generate():
+        for row in rows:
+            yield orjson.dumps(row) + b"\n"
+    return app.response_class(generate(), mimetype='application/x-ndjson')
+
 # Sample data
 customers_data = [
     {"id": 1, "name": "John Doe", "email": "john@example.com", "created_date": "2024-01-15", "status": "active"},
@@ -29,28 +79,111 @@ products_data = [
     {"id": 105, "name": "Desk", "stock": 15, "price": 299.99, "category": "Furniture"}
 ]
 
-# Adding more sample data to reach 1000+ records for scalability testing
-for i in range(6, 1001):
-    customers_data.append({
+# Adding more sample data to reach 1000+ records for scalability testing.
+# Columns are drawn in one vectorized call each and converted to plain
+# Python values with tolist() so orjson/msgpack can encode them directly.
+rng = np.random.default_rng(0)
+
+customer_range = range(6, 1001)
+months = rng.integers(1, 13, size=len(customer_range)).tolist()
+days = rng.integers(1, 29, size=len(customer_range)).tolist()
+statuses = rng.choice(["active", "inactive"], size=len(customer_range)).tolist()
+
+customers_data.extend(
+    {
         "id": i,
         "name": f"Customer {i}",
         "email": f"customer{i}@example.com",
-        "created_date": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}",
-        "status": random.choice(["active", "inactive"])
-    })
+        "created_date": f"2024-{month:02d}-{day:02d}",
+        "status": status
+    }
+    for i, month, day, status in zip(customer_range, months, days, statuses)
+)
+
+product_range = range(106, 1001)
+stocks = rng.integers(1, 101, size=len(product_range)).tolist()
+prices = np.round(rng.uniform(10.0, 999.99, size=len(product_range)), 2).tolist()
+categories = rng.choice(["Electronics", "Education", "Furniture", "Clothing", "Sports"], size=len(product_range)).tolist()
 
-for i in range(106, 1001):
-    products_data.append({
+products_data.extend(
+    {
         "id": i,
         "name": f"Product {i}",
-        "stock": random.randint(1, 100),
-        "price": round(random.uniform(10.0, 999.99), 2),
-        "category": random.choice(["Electronics", "Education", "Furniture", "Clothing", "Sports"])
-    })
+        "stock": stock,
+        "price": price,
+        "category": category
+    }
+    for i, stock, price, category in zip(product_range, stocks, prices, categories)
+)
+
+# id -> record indexes so single-record lookups don't scan the full lists
+customers_by_id = {c['id']: c for c in customers_data}
+products_by_id = {p['id']: p for p in products_data}
+customers_by_email = {c['email']: c['id'] for c in customers_data}
+_next_customer_id = max(customers_by_id) + 1
+_customers_lock = threading.Lock()
+
+# Sorted id columns for keyset pagination (ids are only ever appended in order)
+customer_ids = [c['id'] for c in customers_data]
+product_ids = [p['id'] for p in products_data]
+
+def keyset_page(records, ids, after_id, limit):
+    """Return up to `limit` records with id > after_id, plus the cursor for the next page"""
+    start = bisect.bisect_right(ids, after_id)
+    page_data = records[start:start + limit]
+    next_cursor = page_data[-1]['id'] if page_data and len(page_data) == limit else None
+    return page_data, next_cursor
+
+def page_payload(records, ids, limit, page, after_id):
+    """Keyset page when after_id is given, legacy page/total_pages response otherwise"""
+    if after_id is not None:
+        response_data, next_cursor = keyset_page(records, ids, after_id, limit)
+        return {"data": response_data, "limit": limit, "next_cursor": next_cursor}
+    
+    # Clamp to [0, n] so page=0, negative or huge pages give a predictable window
+    n = len(records)
+    start = max(0, min(n, (page - 1) * limit))
+    end = max(start, min(n, start + limit))
+    
+    return {
+        "data": records[start:end],
+        "page": page,
+        "limit": limit,
+        "total": len(records),
+        "total_pages": (len(records) + limit - 1) // limit
+    }
+
+# Bumped on every write; part of the page cache key so stale bodies are never served
+_data_version = 0
+
+DATASETS = {
+    'customers': (customers_data, customer_ids),
+    'products': (products_data, product_ids)
+}
+
+@functools.lru_cache(maxsize=256)
+def cached_page_body(dataset, limit, page, after_id, mimetype, version):
+    """Serialized page body, so repeated identical page requests skip building and encoding it"""
+    records, ids = DATASETS[dataset]
+    return encode_body(page_payload(records, ids, limit, page, after_id), mimetype)
+
+def page_response(dataset, mimetype=JSON_MIMETYPE):
+    # Pagination support - keyset via ?after_id=, or legacy ?page=
+    limit = int(request.args.get('limit', 100))
+    if limit < 1:
+        return ojson({"error": "limit must be >= 1"}, 400)
+    after_id = request.args.get('after_id')
+    if after_id is not None:
+        after_id, page = int(after_id), None
+    else:
+        page = int(request.args.get('page', 1))
+    
+    body = cached_page_body(dataset, limit, page, after_id, mimetype, _data_version)
+    return app.response_class(body, mimetype=mimetype)
 
 @app.route('/')
 def home():
-    return jsonify({"message": "Mock APIs are running", "timestamp": datetime.now().isoformat()})
+    return ojson({"message": "Mock APIs are running", "timestamp": datetime.now().isoformat()})
 
 # CRM API endpoints
 @app.route('/customers', methods=['GET'])
@@ -58,47 +191,61 @@ def get_customers():
     # Simulate some processing delay
     time.sleep(0.1)
     
-    # Pagination support
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 100))
-    
-    start = (page - 1) * limit
-    end = start + limit
-    
-    response_data = customers_data[start:end]
-    
     # Simulate occasional failures (5% chance)
     if random.random() < 0.05:
-        return jsonify({"error": "CRM system temporarily unavailable"}), 500
+        return ojson({"error": "CRM system temporarily unavailable"}, 500)
     
-    return jsonify({
-        "data": response_data,
-        "page": page,
-        "limit": limit,
-        "total": len(customers_data),
-        "total_pages": (len(customers_data) + limit - 1) // limit
-    })
+    return vary_on_accept(page_response('customers', preferred_mimetype()))
+
+@app.route('/customers.ndjson', methods=['GET'])
+def stream_customers():
+    # Simulate some processing delay
+    time.sleep(0.1)
+    
+    limit = int(request.args.get('limit', 100))
+    if limit < 1:
+        return ojson({"error": "limit must be >= 1"}, 400)
+    after_id = int(request.args.get('after_id', 0))
+    
+    response_data, _ = keyset_page(customers_data, customer_ids, after_id, limit)
+    return ndjson_response(response_data)
+
+@app.route('/customers/count', methods=['GET'])
+def count_customers():
+    return ojson({"total": len(customers_data)})
 
 @app.route('/customers/<int:customer_id>', methods=['GET'])
 def get_customer(customer_id):
-    customer = next((c for c in customers_data if c['id'] == customer_id), None)
+    customer = customers_by_id.get(customer_id)
     if customer:
-        return jsonify(customer)
-    return jsonify({"error": "Customer not found"}), 404
+        return ojson(customer)
+    return ojson({"error": "Customer not found"}, 404)
 
 @app.route('/customers', methods=['POST'])
 def create_customer():
+    global _next_customer_id, _data_version
     data = request.json
-    new_id = max([c['id'] for c in customers_data]) + 1
-    new_customer = {
-        "id": new_id,
-        "name": data.get('name'),
-        "email": data.get('email'),
-        "created_date": datetime.now().strftime('%Y-%m-%d'),
-        "status": "active"
-    }
-    customers_data.append(new_customer)
-    return jsonify(new_customer), 201
+    email = data.get('email')
+    with _customers_lock:
+        if email in customers_by_email:
+            return ojson({"error": "Customer with this email already exists",
+                          "id": customers_by_email[email]}, 409)
+        new_id = _next_customer_id
+        _next_customer_id += 1
+        new_customer = {
+            "id": new_id,
+            "name": data.get('name'),
+            "email": email,
+            "created_date": datetime.now().strftime('%Y-%m-%d'),
+            "status": "active"
+        }
+        customers_data.append(new_customer)
+        customers_by_id[new_id] = new_customer
+        if email is not None:
+            customers_by_email[email] = new_id
+        customer_ids.append(new_id)
+        _data_version += 1
+    return ojson(new_customer, 201)
 
 # Inventory API endpoints
 @app.route('/products', methods=['GET'])
@@ -106,42 +253,51 @@ def get_products():
     # Simulate some processing delay
     time.sleep(0.1)
     
-    # Pagination support
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 100))
-    
-    start = (page - 1) * limit
-    end = start + limit
-    
-    response_data = products_data[start:end]
-    
     # Simulate occasional failures (0.5% chance - reduced from 3%)
     if random.random() < 0.005:
-        return jsonify({"error": "Inventory system temporarily unavailable"}), 500
+        return ojson({"error": "Inventory system temporarily unavailable"}, 500)
     
-    return jsonify({
-        "data": response_data,
-        "page": page,
-        "limit": limit,
-        "total": len(products_data),
-        "total_pages": (len(products_data) + limit - 1) // limit
-    })
+    return page_response('products')
+
+@app.route('/products.ndjson', methods=['GET'])
+def stream_products():
+    # Simulate some processing delay
+    time.sleep(0.1)
+    
+    limit = int(request.args.get('limit', 100))
+    if limit < 1:
+        return ojson({"error": "limit must be >= 1"}, 400)
+    after_id = int(request.args.get('after_id', 0))
+    
+    response_data, _ = keyset_page(products_data, product_ids, after_id, limit)
+    return ndjson_response(response_data)
+
+@app.route('/products/count', methods=['GET'])
+def count_products():
+    return ojson({"total": len(products_data)})
 
 @app.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
-    product = next((p for p in products_data if p['id'] == product_id), None)
+    product = products_by_id.get(product_id)
     if product:
-        return jsonify(product)
-    return jsonify({"error": "Product not found"}), 404
+        return ojson(product)
+    return ojson({"error": "Product not found"}, 404)
 
 # Enhanced Analytics API endpoint (receives the merged data)
 @app.route('/analytics/data', methods=['POST'])
 def receive_analytics_data():
     try:
-        data = request.get_json()
+        # Parse the raw body ourselves instead of going through Flask's stdlib-based get_json()
+        raw = request.get_data(cache=False)
+        if request.content_encoding == 'gzip':
+            raw = gzip.decompress(raw)
+        if request.mimetype == MSGPACK_MIMETYPE:
+            data = msgpack.unpackb(raw, raw=False)
+        else:
+            data = orjson.loads(raw) if raw else None
         
         if not data:
-            return jsonify({"error": "No data provided"}), 400
+            return ojson({"error": "No data provided"}, 400)
         
         # Handle different data formats
         customers_count = 0
@@ -175,48 +331,59 @@ def receive_analytics_data():
         # Simulate processing time
         time.sleep(0.05)
         
-        return jsonify({
+        return negotiated({
             "status": "success",
             "message": "Analytics data processed successfully",
             "customers_processed": customers_count,
             "inventory_processed": inventory_count,
             "total_records": customers_count + inventory_count,
             "processed_at": datetime.now().isoformat()
-        }), 200
+        }, 200)
         
     except Exception as e:
         logger.error(f"Error processing analytics data: {str(e)}")
-        return jsonify({"error": f"Failed to process data: {str(e)}"}), 500
+        return ojson({"error": f"Failed to process data: {str(e)}"}, 500)
+
+# Health check endpoint - the constant part is encoded once and only the
+# timestamp is appended per request (the monitor polls this every 10s)
+_HEALTH_BODY_PREFIX = encode_body({
+    "status": "healthy",
+    "services": {
+        "customers": "available",
+        "products": "available", 
+        "analytics": "available"
+    }
+})[:-1]
 
-# Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({
-        "status": "healthy",
-        "services": {
-            "customers": "available",
-            "products": "available", 
-            "analytics": "available"
-        },
-        "timestamp": datetime.now().isoformat()
-    })
-
-# Analytics status endpoint
+    body = _HEALTH_BODY_PREFIX + b',"timestamp":"' + datetime.now().isoformat().encode() + b'"}'
+    return app.response_class(body, mimetype=JSON_MIMETYPE)
+
+# Analytics status endpoint - fully constant, so serve pre-encoded bytes
+_ANALYTICS_STATUS_BODY = encode_body({
+    "status": "ready",
+    "endpoint": "/analytics/data",
+    "methods": ["POST"],
+    "message": "Analytics service is ready to receive data"
+})
+
 @app.route('/analytics/status', methods=['GET'])
 def analytics_status():
-    return jsonify({
-        "status": "ready",
-        "endpoint": "/analytics/data",
-        "methods": ["POST"],
-        "message": "Analytics service is ready to receive data"
-    })
+    return app.response_class(_ANALYTICS_STATUS_BODY, mimetype=JSON_MIMETYPE)
 
 if __name__ == '__main__':
     print("Starting Mock APIs server...")
     print("Available endpoints:")
     print("- GET /customers (CRM)")
+    print("- GET /customers.ndjson (CRM, streamed)")
+    print("- GET /customers/count (CRM)")
     print("- GET /products (Inventory)")  
+    print("- GET /products.ndjson (Inventory, streamed)")
+    print("- GET /products/count (Inventory)")
     print("- POST /analytics/data (Analytics)")
     print("- GET /health (Health Check)")
     print("- GET /analytics/status (Analytics Status)")
-    app.run(host='0.0.0.0', port=8080, debug=True)
+    # Threaded dev server without the debugger/reloader; use gunicorn for load runs
+    # (see docs/DEPLOYMENT.md)
+    app.run(host='0.0.0.0', port=8080, threaded=True)
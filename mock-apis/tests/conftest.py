@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+from unittest.mock import patch
+
+# Make app.py importable from every test module (loaded once per session)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as mock_app
+
+
+@pytest.fixture
+def client():
+    """Flask test client with the simulated delay and random failures switched off"""
+    with patch('app.time.sleep'), patch('app.random.random', return_value=1.0):
+        yield mock_app.app.test_client()
@@ -0,0 +1,64 @@
+import msgpack
+
+import app as mock_app
+
+
+class TestMockApis:
+
+    def test_created_customer_appears_on_cached_page(self, client):
+        """Test that a POST invalidates the page cache so the next GET sees the new record"""
+        # Given - cache the (empty) page after the current last customer
+        last_id = mock_app.customer_ids[-1]
+        before = client.get(f'/customers?after_id={last_id}&limit=10')
+        assert before.get_json()['data'] == []
+
+        # When
+        created = client.post('/customers', json={'name': 'New Customer', 'email': 'new.customer@example.com'})
+        after = client.get(f'/customers?after_id={last_id}&limit=10')
+
+        # Then
+        assert created.status_code == 201
+        assert [c['id'] for c in after.get_json()['data']] == [created.get_json()['id']]
+
+    def test_duplicate_email_is_rejected(self, client):
+        """Test that creating a customer with an existing email returns 409 and the existing id"""
+        # When
+        response = client.post('/customers', json={'name': 'Another John', 'email': 'john@example.com'})
+
+        # Then
+        assert response.status_code == 409
+        assert response.get_json()['id'] == 1
+
+    def test_keyset_paging_ends_with_null_cursor(self, client):
+        """Test that following next_cursor visits every customer once and then stops"""
+        # Given
+        seen = []
+        cursor = 0
+
+        # When
+        while cursor is not None:
+            body = client.get(f'/customers?after_id={cursor}&limit=300').get_json()
+            seen.extend(c['id'] for c in body['data'])
+            cursor = body['next_cursor']
+
+        # Then
+        assert seen == mock_app.customer_ids
+
+    def test_non_positive_limit_is_rejected(self, client):
+        """Test that limit=0 is a 400 rather than an empty-page IndexError"""
+        # When
+        response = client.get('/customers?after_id=0&limit=0')
+
+        # Then
+        assert response.status_code == 400
+
+    def test_msgpack_accept_header_is_honoured(self, client):
+        """Test that Accept: application/x-msgpack gets a MessagePack body"""
+        # When
+        response = client.get('/customers?limit=5', headers={'Accept': 'application/x-msgpack'})
+
+        # Then
+        assert response.mimetype == 'application/x-msgpack'
+        assert 'Accept' in response.vary
+        body = msgpack.unpackb(response.data)
+        assert [c['id'] for c in body['data']] == [1, 2, 3, 4, 5]
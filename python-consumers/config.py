@@ -15,6 +15,8 @@ class Config:
     BATCH_SIZE = int(os.getenv('BATCH_SIZE', '10'))
     MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
     RETRY_DELAY = int(os.getenv('RETRY_DELAY', '5'))  # seconds
+    # Upper bound on unsent records per buffer; oldest are evicted once full
+    MAX_BUFFERED_RECORDS = int(os.getenv('MAX_BUFFERED_RECORDS', '100000'))
     
     # Idempotency Configuration
     PROCESSED_RECORDS_CACHE_SIZE = int(os.getenv('CACHE_SIZE', '10000'))
@@ -26,6 +26,9 @@ class SimplePerformanceMonitor:
         self.total_records_processed = 0
         
         self.running = True
+        
+        # Prime psutil's CPU counters so later non-blocking reads return a delta
+        psutil.cpu_percent(interval=None)
 
     def check_api_health(self):
         """Check if analytics API is responding"""
@@ -55,7 +58,7 @@ class SimplePerformanceMonitor:
     def get_system_metrics(self):
         """Get current system resource usage"""
         return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
+            'cpu_percent': psutil.cpu_percent(interval=None),  # since the previous call, no 1s sleep
             'memory_percent': psutil.virtual_memory().percent,
             'disk_usage': psutil.disk_usage('.').percent
         }
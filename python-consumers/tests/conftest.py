@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+from unittest.mock import patch
+
+# Make the consumer modules importable from every test module (loaded once per session)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from consumer import IntegrationConsumer
+
+
+@pytest.fixture(scope='module')
+def consumer_factory():
+    """IntegrationConsumer class with KafkaConsumer patched once per module instead of per test"""
+    with patch('consumer.KafkaConsumer'):
+        yield IntegrationConsumer
@@ -1,23 +1,23 @@
 import pytest
 import json
+import gzip
+import msgpack
 from unittest.mock import Mock, patch, MagicMock
-import sys
-import os
+import threading
 from datetime import datetime
 
-# Add parent directory to path to import modules
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
 from consumer import IntegrationConsumer
 from config import Config
 
 class TestIntegrationConsumer:
     
+    @pytest.fixture(autouse=True)
+    def _consumer(self, consumer_factory):
+        """Fresh consumer per test, built under the module-scoped KafkaConsumer patch"""
+        self.consumer = consumer_factory()
+    
     def setup_method(self):
         """Setup test fixtures"""
-        with patch('consumer.KafkaConsumer'):
-            self.consumer = IntegrationConsumer()
-        
         self.sample_customer = {
             "id": 1,
             "name": "John Doe",
@@ -48,7 +48,7 @@ class TestIntegrationConsumer:
         assert latest_record['id'] == 1
         assert latest_record['name'] == 'John Doe'
         assert latest_record['email'] == 'john@example.com'
-        assert 'received_at' in latest_record
+        assert 'received_at_ns' in latest_record
     
     def test_process_inventory_record_success(self):
         """Test successful inventory record processing"""
@@ -64,9 +64,9 @@ class TestIntegrationConsumer:
         assert latest_record['id'] == 101
         assert latest_record['name'] == 'Laptop'
         assert latest_record['price'] == 999.99
-        assert 'received_at' in latest_record
+        assert 'received_at_ns' in latest_record
     
-    @patch('consumer.requests.post')
+    @patch('consumer.requests.Session.post')
     def test_merge_and_send_data_success(self, mock_post):
         """Test successful data merging and sending"""
         # Given
@@ -86,11 +86,13 @@ class TestIntegrationConsumer:
         call_args = mock_post.call_args
         
         # Check the API was called with correct URL
-        assert call_args[1]['json']['summary']['total_customers'] >= 1
-        assert call_args[1]['json']['summary']['total_products'] >= 1
-        assert 'timestamp' in call_args[1]['json']
+        sent_data = msgpack.unpackb(gzip.decompress(call_args[1]['data']))
+        assert sent_data['summary']['total_customers'] >= 1
+        assert sent_data['summary']['total_products'] >= 1
+        assert sent_data['summary']['active_customers'] == 1
+        assert 'timestamp' in sent_data
     
-    @patch('consumer.requests.post')
+    @patch('consumer.requests.Session.post')
     def test_merge_and_send_data_api_failure(self, mock_post):
         """Test handling of API failure during data sending"""
         # Given
@@ -113,11 +115,11 @@ class TestIntegrationConsumer:
     def test_merge_and_send_data_no_data(self):
         """Test merge and send with no data"""
         # Given
-        self.consumer.customer_records = []
-        self.consumer.inventory_records = []
+        self.consumer.customer_records.clear()
+        self.consumer.inventory_records.clear()
         
         # When
-        with patch('consumer.requests.post') as mock_post:
+        with patch('consumer.requests.Session.post') as mock_post:
             self.consumer.merge_and_send_data()
         
         # Then
@@ -140,32 +142,165 @@ class TestIntegrationConsumer:
         mock_response = Mock()
         mock_response.status_code = 200
         
-        # Add more than 100 records to test cleanup
+        # Add a batch of records to test cleanup
         for i in range(105):
             customer = self.sample_customer.copy()
             customer['id'] = i
             self.consumer.process_customer_record(customer)
         
         # When
-        with patch('consumer.requests.post', return_value=mock_response):
+        with patch('consumer.requests.Session.post', return_value=mock_response):
             self.consumer.merge_and_send_data()
         
         # Then
-        assert len(self.consumer.customer_records) <= 100  # Should keep only last 100
+        assert len(self.consumer.customer_records) == 0  # Every sent record is drained
     
+    def test_records_received_during_send_are_kept(self):
+        """Test that records arriving while a send is in flight survive the cleanup"""
+        # Given
+        mock_response = Mock()
+        mock_response.status_code = 200
+        
+        def post_while_receiving(*args, **kwargs):
+            late_customer = self.sample_customer.copy()
+            late_customer['id'] = 2
+            self.consumer.process_customer_record(late_customer)
+            return mock_response
+        
+        self.consumer.process_customer_record(self.sample_customer)
+        
+        # When
+        with patch('consumer.requests.Session.post', side_effect=post_while_receiving):
+            self.consumer.merge_and_send_data()
+        
+        # Then
+        assert len(self.consumer.customer_records) == 1
+        assert self.consumer.customer_records[0]['id'] == 2
+    
+    def test_background_flush_skipped_while_in_flight(self):
+        """Test that a second flush is not queued while one is still running"""
+        # Given
+        release_post = threading.Event()
+        mock_response = Mock()
+        mock_response.status_code = 200
+        
+        def slow_post(*args, **kwargs):
+            release_post.wait(timeout=5)
+            return mock_response
+        
+        self.consumer.process_customer_record(self.sample_customer)
+        
+        # When
+        with patch('consumer.requests.Session.post', side_effect=slow_post) as mock_post:
+            first = self.consumer.flush_in_background()
+            second = self.consumer.flush_in_background()
+            release_post.set()
+            first.result(timeout=5)
+        
+        # Then
+        assert second is None
+        mock_post.assert_called_once()
+        assert len(self.consumer.customer_records) == 0
+    
+    def test_background_flush_skipped_when_nothing_new(self):
+        """Test that quiet intervals don't submit a flush at all"""
+        # When
+        with patch('consumer.requests.Session.post') as mock_post:
+            future = self.consumer.flush_in_background()
+        
+        # Then
+        assert future is None
+        mock_post.assert_not_called()
+    
+    def test_buffer_bounded_by_max_buffered_records(self):
+        """Test that the record buffer evicts the oldest records once full"""
+        # Given
+        with patch('consumer.KafkaConsumer'), patch.object(Config, 'MAX_BUFFERED_RECORDS', 100):
+            consumer = IntegrationConsumer()
+        
+        # When
+        for i in range(105):
+            customer = self.sample_customer.copy()
+            customer['id'] = i
+            consumer.process_customer_record(customer)
+        
+        # Then
+        assert len(consumer.customer_records) == 100
+        assert consumer.customer_records[0]['id'] == 5
+
+    def test_full_buffer_keeps_records_received_during_send(self):
+        """Test that evictions during the POST don't make the cleanup drop unsent records"""
+        # Given
+        with patch('consumer.KafkaConsumer'), patch.object(Config, 'MAX_BUFFERED_RECORDS', 5):
+            consumer = IntegrationConsumer()
+        mock_response = Mock()
+        mock_response.status_code = 200
+
+        def post_while_receiving(*args, **kwargs):
+            for i in range(5, 8):
+                late_customer = self.sample_customer.copy()
+                late_customer['id'] = i
+                consumer.process_customer_record(late_customer)
+            return mock_response
+
+        for i in range(5):
+            customer = self.sample_customer.copy()
+            customer['id'] = i
+            consumer.process_customer_record(customer)
+
+        # When
+        with patch('consumer.requests.Session.post', side_effect=post_while_receiving):
+            consumer.merge_and_send_data()
+
+        # Then
+        assert [record['id'] for record in consumer.customer_records] == [5, 6, 7]
+
+    def test_consume_loop_stops_after_max_messages(self):
+        """Test that consume_loop routes by topic and honours max_messages"""
+        # Given
+        messages = [
+            Mock(topic=Config.CUSTOMER_TOPIC, value=self.sample_customer),
+            Mock(topic=Config.INVENTORY_TOPIC, value=self.sample_product),
+            Mock(topic=Config.CUSTOMER_TOPIC, value=self.sample_customer)
+        ]
+
+        # When
+        processed = self.consumer.consume_loop(iter(messages), max_messages=2)
+
+        # Then
+        assert processed == 2
+        assert len(self.consumer.customer_records) == 1
+        assert len(self.consumer.inventory_records) == 1
+
+    @patch('consumer.requests.Session.post')
+    def test_consume_messages_flushes_remaining_records_on_shutdown(self, mock_post):
+        """Test that the last partial interval is sent once the consumer stops"""
+        # Given
+        mock_post.return_value = Mock(status_code=200)
+        self.consumer.consumer.__iter__.return_value = iter([
+            Mock(topic=Config.CUSTOMER_TOPIC, value=self.sample_customer)
+        ])
+
+        # When
+        self.consumer.consume_messages()
+
+        # Then
+        mock_post.assert_called_once()
+        assert len(self.consumer.customer_records) == 0
+
     def test_thread_safety_with_concurrent_processing(self):
         """Test thread safety of record processing"""
         import threading
         
         # Given
         def add_customers():
-            for i in range(10):
+            for i in range(1000):
                 customer = self.sample_customer.copy()
                 customer['id'] = f"customer_{i}"
                 self.consumer.process_customer_record(customer)
         
         def add_products():
-            for i in range(10):
+            for i in range(1000):
                 product = self.sample_product.copy()
                 product['id'] = f"product_{i}"
                 self.consumer.process_inventory_record(product)
@@ -181,8 +316,9 @@ class TestIntegrationConsumer:
         product_thread.join()
         
         # Then
-        assert len(self.consumer.customer_records) == 10
-        assert len(self.consumer.inventory_records) == 10
+        # Lock-free deque appends must not lose records under contention
+        assert len(self.consumer.customer_records) == 1000
+        assert len(self.consumer.inventory_records) == 1000
 
 
 
@@ -3,10 +3,6 @@ from unittest.mock import Mock, patch, MagicMock
 from kafka import KafkaConsumer
 from kafka.errors import KafkaError
 import json
-import sys
-import os
-
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from consumer import IntegrationConsumer
 
@@ -6,6 +6,55 @@ import requests
 from unittest.mock import Mock, patch
 import psutil
 import os
+import socket
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _wait_port(host, port, timeout, proc=None):
+    """Poll until host:port accepts a TCP connection; give up early if proc has exited"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc is not None and proc.poll() is not None:
+            return False
+        try:
+            with socket.create_connection((host, port), 0.5):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _wait_kafka(bootstrap_servers, timeout):
+    """Poll until the broker answers a metadata request; an open port alone isn't readiness"""
+    from kafka.admin import KafkaAdminClient
+    from kafka.errors import KafkaError
+    
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            admin_client = KafkaAdminClient(
+                bootstrap_servers=bootstrap_servers,
+                client_id='test_readiness',
+                request_timeout_ms=5000
+            )
+            try:
+                admin_client.list_topics()
+                return True
+            finally:
+                admin_client.close()
+        except KafkaError:
+            time.sleep(1)
+    return False
+
+
+def _try_get(session, url, timeout=5):
+    """GET url on a shared session, returning the status code or None if unreachable"""
+    try:
+        return session.get(url, timeout=timeout).status_code
+    except requests.exceptions.RequestException:
+        return None
+
 
 class TestEndToEndIntegration:
     """End-to-end integration tests for the complete system"""
@@ -15,14 +64,16 @@ class TestEndToEndIntegration:
         self.project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.kafka_running = False
         self.producer_running = False
+        self._java_procs = []  # Popen handles of spawned producers, terminated directly on teardown
         
     def teardown_class(self):
         """Cleanup after all tests"""
-        if self.producer_running:
+        if self._java_procs:
             self.stop_producers()
         if self.kafka_running:
             self.stop_kafka()
     
+    @pytest.mark.xdist_group("docker")
     def test_docker_infrastructure_startup(self):
         """Test that Docker infrastructure starts correctly"""
         # Given
@@ -42,17 +93,18 @@ class TestEndToEndIntegration:
                 timeout=120  # 2 minutes timeout
             )
             
-            # Wait for services to be ready
-            time.sleep(30)
-            
             # Then
             if result.returncode != 0:
                 pytest.skip(f"Docker compose failed or not available: {result.stderr}")
             self.kafka_running = True
             
+            # The Docker proxy accepts TCP before the broker is up, so wait for a metadata reply
+            assert _wait_kafka(['localhost:9092'], 60), "Kafka did not become ready on port 9092"
+            
         except (subprocess.TimeoutExpired, FileNotFoundError):
             pytest.skip("Docker not available or startup timed out")
     
+    @pytest.mark.xdist_group("docker")
     def test_kafka_connectivity(self):
         """Test Kafka connectivity and topic creation"""
         # Test without requiring Docker - use embedded Kafka approach
@@ -94,21 +146,19 @@ class TestEndToEndIntegration:
             'http://localhost:8080/analytics/data'
         ]
         
-        # When & Then
-        available_endpoints = 0
-        for endpoint in mock_api_endpoints:
-            try:
-                response = requests.get(endpoint, timeout=5)
-                if response.status_code in [200, 404]:
-                    available_endpoints += 1
-            except requests.exceptions.ConnectionError:
-                continue
+        # When - Probe all endpoints concurrently over one keep-alive session
+        with requests.Session() as session, ThreadPoolExecutor(max_workers=len(mock_api_endpoints)) as executor:
+            results = list(executor.map(lambda endpoint: _try_get(session, endpoint), mock_api_endpoints))
+        
+        # Then
+        available_endpoints = sum(1 for status_code in results if status_code in [200, 404])
         
         if available_endpoints == 0:
             pytest.skip("No mock APIs available - start mock-apis first")
         
         assert available_endpoints > 0, "At least one mock API should be available"
     
+    @pytest.mark.xdist_group("docker")
     @pytest.mark.integration
     def test_java_producer_to_kafka_flow(self):
         """Test Java producers publishing to Kafka"""
@@ -119,87 +169,78 @@ class TestEndToEndIntegration:
         if not os.path.exists(pom_xml):
             pytest.skip("Maven project not found")
         
-        try:
-            # When
-            producer_process = subprocess.Popen(
-                ['mvn', 'spring-boot:run'],
-                cwd=java_producer_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            self.producer_running = True
-            time.sleep(15)  # Allow producers to run and publish messages
-            
-            # Then - Check if process is running (simplified test)
-            assert producer_process.poll() is None, "Java producer should be running"
-            
-            # Basic validation - check logs for startup success
-            producer_process.terminate()
-            stdout, stderr = producer_process.communicate(timeout=10)
-            output = stdout.decode('utf-8') + stderr.decode('utf-8')
-            
-            # Look for Spring Boot startup indicators
-            startup_success = any(indicator in output.lower() for indicator in [
-                'started', 'application', 'spring', 'kafka'
-            ])
-            
-            assert startup_success, "Java producer should start successfully"
-            
-        except FileNotFoundError:
-            pytest.skip("Maven not found - install Maven or adjust test")
-        except Exception as e:
-            pytest.fail(f"Java producer test failed: {e}")
-    
-    @pytest.mark.integration  
-    def test_python_consumer_processing(self):
-        """Test Python consumers processing messages"""
-        # Given - Check if consumer exists
-        consumer_path = os.path.join(self.project_root, 'python-consumers')
-        consumer_file = os.path.join(consumer_path, 'consumer.py')
-        
-        if not os.path.exists(consumer_file):
-            pytest.skip("Python consumer not found")
-        
-        try:
-            # When - Start Python consumer with timeout
-            consumer_process = subprocess.Popen(
-                ['python', 'consumer.py'],
-                cwd=consumer_path,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            time.sleep(10)  # Allow processing time
-            
-            # Then - Check consumer runs without immediate crash
-            if consumer_process.poll() is not None:
-                stdout, stderr = consumer_process.communicate()
-                output = stdout.decode('utf-8') + stderr.decode('utf-8')
-                
-                # If it exited, check if it was due to missing Kafka (acceptable)
-                if 'kafka' in output.lower() or 'broker' in output.lower():
-                    pytest.skip("Kafka not available for consumer test")
-                else:
-                    pytest.fail(f"Consumer exited unexpectedly: {output}")
-            
-            # Terminate and check output
-            consumer_process.terminate()
+        # Maven output goes to a file: an unread PIPE can fill up and block the child mid-startup
+        with tempfile.TemporaryFile() as log_file:
             try:
-                stdout, stderr = consumer_process.communicate(timeout=5)
-                output = stdout.decode('utf-8') + stderr.decode('utf-8')
+                # When
+                producer_process = subprocess.Popen(
+                    ['mvn', 'spring-boot:run'],
+                    cwd=java_producer_path,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT
+                )
                 
-                # Look for successful startup indicators
-                startup_indicators = ['consumer', 'kafka', 'processing', 'started']
-                startup_found = any(indicator in output.lower() for indicator in startup_indicators)
+                self._java_procs.append(producer_process)
+                self.producer_running = True
+                # Spring Boot listens on server.port=8081 once the context has started
+                ready = _wait_port('localhost', 8081, 90, proc=producer_process)
                 
-                assert startup_found or len(output) > 0, "Consumer should produce some output"
+                # Then - Check if process is running (simplified test)
+                assert producer_process.poll() is None, "Java producer should be running"
+                assert ready, "Java producer did not start listening on port 8081"
                 
-            except subprocess.TimeoutExpired:
-                consumer_process.kill()
+                # Basic validation - check logs for startup success
+                producer_process.terminate()
+                producer_process.wait(timeout=10)
+                log_file.seek(0)
+                output = log_file.read().decode('utf-8', errors='replace')
+                
+                # Look for Spring Boot startup indicators
+                startup_success = any(indicator in output.lower() for indicator in [
+                    'started', 'application', 'spring', 'kafka'
+                ])
+                
+                assert startup_success, "Java producer should start successfully"
                 
-        except Exception as e:
-            pytest.fail(f"Python consumer test failed: {e}")
+            except FileNotFoundError:
+                pytest.skip("Maven not found - install Maven or adjust test")
+            except Exception as e:
+                pytest.fail(f"Java producer test failed: {e}")
+    
+    def test_python_consumer_processing(self):
+        """Test Python consumer processing messages from an in-process fake Kafka consumer"""
+        # Given - Consumer imported in-process instead of spawning `python consumer.py`
+        import sys
+        consumer_path = os.path.join(self.project_root, 'python-consumers')
+        if consumer_path not in sys.path:
+            sys.path.append(consumer_path)
+        
+        from config import Config
+        with patch('consumer.KafkaConsumer'):
+            from consumer import IntegrationConsumer
+            consumer = IntegrationConsumer()
+        
+        messages = [
+            Mock(topic=Config.CUSTOMER_TOPIC, value={'id': i, 'name': f'Customer {i}', 'status': 'active'})
+            for i in range(5)
+        ] + [
+            Mock(topic=Config.INVENTORY_TOPIC, value={'id': i, 'name': f'Product {i}', 'quantity': i})
+            for i in range(5)
+        ]
+        fake_kafka = Mock()
+        fake_kafka.__iter__ = Mock(return_value=iter(messages))
+        
+        # When
+        processed = consumer.consume_loop(fake_kafka, max_messages=10)
+        
+        # Then
+        assert processed == 10
+        assert len(consumer.customer_records) == 5
+        assert len(consumer.inventory_records) == 5
+        assert consumer.customer_records[0]['name'] == 'Customer 0'
+        assert consumer.inventory_records[4]['quantity'] == 4
+        
+        consumer.flush_pool.shutdown(wait=True)
     
     @pytest.mark.performance
     def test_system_performance_under_load(self):
@@ -331,14 +372,13 @@ class TestEndToEndIntegration:
     
     def stop_producers(self):
         """Stop Java producers"""
-        try:
-            # Kill any Maven processes related to the project
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = ' '.join(proc.info['cmdline']).lower()
-                    if 'mvn' in cmdline and 'spring-boot:run' in cmdline:
-                        proc.terminate()
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    pass
-        except Exception:
-            pass  # Best effort cleanup
+        # Only the processes this suite spawned - no system-wide process scan
+        for proc in self._java_procs:
+            try:
+                proc.terminate()
+                proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+            except Exception:
+                pass  # Best effort cleanup
+        self._java_procs.clear()